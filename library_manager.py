@@ -1,9 +1,34 @@
+import heapq
 import json
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+import re
+import sys
+import time
+from datetime import datetime
+from operator import attrgetter
+from typing import Dict, Iterable, List, Optional
+
+# Extratores em C para somas sobre os livros (mais rápidos que
+# expressões geradoras com acesso a atributo no interpretador)
+_TOTAL_COPIES = attrgetter("total_copies")
+_AVAILABLE_COPIES = attrgetter("available_copies")
+
+# Tokenizador compartilhado entre indexação e consulta
+_WORD_RE = re.compile(r"\w+")
 
 
 class Book:
+    __slots__ = (
+        "isbn",
+        "title",
+        "author",
+        "year",
+        "total_copies",
+        "available_copies",
+        "_title_lc",
+        "_author_lc",
+        "_static_dict",
+    )
+
     def __init__(self, isbn: str, title: str, author: str, year: int, copies: int = 1):
         self.isbn = isbn
         self.title = title
@@ -11,74 +36,138 @@ class Book:
         self.year = year
         self.total_copies = copies
         self.available_copies = copies
+        # Versões minúsculas pré-computadas para busca
+        self._title_lc = title.lower()
+        self._author_lc = author.lower()
+        # Parte imutável da serialização, montada uma única vez
+        self._static_dict = {
+            "isbn": isbn,
+            "title": title,
+            "author": author,
+            "year": year,
+        }
 
     def __str__(self):
         return f"{self.title} by {self.author} ({self.year}) - ISBN: {self.isbn}"
 
     def to_dict(self):
         return {
-            "isbn": self.isbn,
-            "title": self.title,
-            "author": self.author,
-            "year": self.year,
+            **self._static_dict,
             "total_copies": self.total_copies,
             "available_copies": self.available_copies,
         }
 
 
 class User:
+    __slots__ = (
+        "user_id",
+        "name",
+        "email",
+        "borrowed_books",
+        "registration_date",
+        "_static_dict",
+    )
+
     def __init__(self, user_id: str, name: str, email: str):
         self.user_id = user_id
         self.name = name
         self.email = email
-        self.borrowed_books = []
+        self.borrowed_books: set = set()
         self.registration_date = datetime.now()
+        # Parte imutável da serialização, montada uma única vez
+        self._static_dict = {
+            "user_id": user_id,
+            "name": name,
+            "email": email,
+            "registration_date": self.registration_date.isoformat(),
+        }
 
     def __str__(self):
         return f"{self.name} ({self.email}) - ID: {self.user_id}"
 
     def to_dict(self):
         return {
-            "user_id": self.user_id,
-            "name": self.name,
-            "email": self.email,
-            "borrowed_books": self.borrowed_books,
-            "registration_date": self.registration_date.isoformat(),
+            **self._static_dict,
+            "borrowed_books": list(self.borrowed_books),
         }
 
 
 class Loan:
+    __slots__ = (
+        "user_id",
+        "isbn",
+        "loan_ts",
+        "due_ts",
+        "return_ts",
+        "is_active",
+        "_static_dict",
+        "_return_date_iso",
+    )
+
     def __init__(self, user_id: str, isbn: str, loan_days: int = 14):
         self.user_id = user_id
         self.isbn = isbn
-        self.loan_date = datetime.now()
-        self.due_date = self.loan_date + timedelta(days=loan_days)
-        self.return_date = None
+        # Datas armazenadas como segundos Unix inteiros: empacotam melhor
+        # nos slots e comparam mais rápido que objetos datetime
+        self.loan_ts: int = int(time.time())
+        self.due_ts: int = self.loan_ts + loan_days * 86400
+        self.return_ts: Optional[int] = None
         self.is_active = True
+        self._return_date_iso = None
+        # Parte imutável da serialização, montada uma única vez
+        self._static_dict = {
+            "user_id": user_id,
+            "isbn": isbn,
+            "loan_date": datetime.fromtimestamp(self.loan_ts).isoformat(),
+            "due_date": datetime.fromtimestamp(self.due_ts).isoformat(),
+        }
+
+    @property
+    def loan_date(self) -> datetime:
+        return datetime.fromtimestamp(self.loan_ts)
+
+    @property
+    def due_date(self) -> datetime:
+        return datetime.fromtimestamp(self.due_ts)
+
+    @due_date.setter
+    def due_date(self, value: datetime):
+        # Mantém o timestamp e a serialização em sincronia
+        self.due_ts = int(value.timestamp())
+        self._static_dict["due_date"] = value.isoformat()
+
+    @property
+    def return_date(self) -> Optional[datetime]:
+        if self.return_ts is None:
+            return None
+        return datetime.fromtimestamp(self.return_ts)
 
     def return_book(self):
         # Marca o livro como devolvido
-        self.return_date = datetime.now()
+        self.return_ts = int(time.time())
+        self._return_date_iso = datetime.fromtimestamp(self.return_ts).isoformat()
         self.is_active = False
 
-    def is_overdue(self):
+    def is_overdue(self, now_ts: Optional[float] = None):
         # Verifica se o empréstimo está em atraso
-        return self.is_active and datetime.now() > self.due_date
+        if now_ts is None:
+            now_ts = time.time()
+        return self.is_active and now_ts > self.due_ts
 
-    def days_overdue(self):
+    def days_overdue(self, now_ts: Optional[float] = None):
         # Calcula quantos dias de atraso
-        if not self.is_overdue():
+        if now_ts is None:
+            now_ts = time.time()
+        if not self.is_active:
             return 0
-        return (datetime.now() - self.due_date).days
+        days = int((now_ts - self.due_ts) // 86400)
+        return days if days > 0 else 0
 
     def to_dict(self):
         # Converte o empréstimo para dicionário
         return {
-            "user_id": self.user_id,
-            "isbn": self.isbn,
-            "loan_date": self.loan_date.isoformat(),
-            "due_date": self.due_date.isoformat(),
-            "return_date": self.return_date.isoformat() if self.return_date else None,
+            **self._static_dict,
+            "return_date": self._return_date_iso,
             "is_active": self.is_active,
         }
 
@@ -87,28 +176,83 @@ class LibraryManager:
     def __init__(self):
         self.books: Dict[str, Book] = {}
         self.users: Dict[str, User] = {}
-        self.loans: List[Loan] = []
+        # Empréstimos em aberto (indexados por id() para remoção em O(1))
+        # e histórico de devolvidos, separados para que as consultas
+        # toquem apenas os ativos
+        self._active_loans: Dict[int, Loan] = {}
+        self._archived_loans: List[Loan] = []
+        # Índice secundário: user_id -> {isbn: empréstimo ativo}
+        self._active_loans_by_user: Dict[str, Dict[str, Loan]] = {}
+        # Heap de empréstimos ativos ordenado por data de vencimento
+        self._active_loan_heap: List[tuple] = []
+        # Emails já registrados, para detecção de duplicatas em O(1)
+        self._emails: set = set()
+        # Índice invertido: token minúsculo -> ISBNs que o contêm
+        self._token_index: Dict[str, set] = {}
+        # Resultados de busca memoizados por consulta; limpo quando o
+        # acervo ganha títulos novos
+        self._search_cache: Dict[str, List[Book]] = {}
+        # Agregados mantidos incrementalmente para estatísticas em O(1)
+        self._total_copies_sum = 0
+        self._available_copies_sum = 0
+        self._active_loan_count = 0
+
+    @property
+    def loans(self) -> List[Loan]:
+        # Visão combinada (ativos + devolvidos), mantida por compatibilidade
+        return list(self._active_loans.values()) + self._archived_loans
 
     def add_book(self, isbn: str, title: str, author: str, year: int, copies: int = 1):
-        if isbn in self.books:
+        # Interna o ISBN: comparações viram comparação de ponteiro
+        isbn = sys.intern(isbn)
+        self._total_copies_sum += copies
+        self._available_copies_sum += copies
+
+        existing = self.books.get(isbn)
+        if existing is not None:
             # Se o livro já existe, adiciona mais cópias
-            self.books[isbn].total_copies += copies
-            self.books[isbn].available_copies += copies
+            existing.total_copies += copies
+            existing.available_copies += copies
             return f"Adicionadas {copies} cópias do livro existente"
         else:
-            self.books[isbn] = Book(isbn, title, author, year, copies)
+            book = Book(isbn, title, author, year, copies)
+            self.books[isbn] = book
+            self._index_book(book)
+            self._search_cache.clear()
             return f"Livro '{title}' adicionado com sucesso"
 
+    def bulk_add_books(self, book_data: Iterable[tuple]):
+        # Carga em lote de livros inéditos (ISBNs únicos, ainda não no
+        # acervo); dispensa a checagem de existência feita em add_book,
+        # mas interna o ISBN como lá
+        new_books = [Book(sys.intern(data[0]), *data[1:]) for data in book_data]
+        self.books.update({book.isbn: book for book in new_books})
+
+        for book in new_books:
+            self._index_book(book)
+
+        self._total_copies_sum += sum(map(_TOTAL_COPIES, new_books))
+        self._available_copies_sum += sum(map(_AVAILABLE_COPIES, new_books))
+        self._search_cache.clear()
+        return f"{len(new_books)} livros adicionados com sucesso"
+
+    def _index_book(self, book: Book):
+        # Indexa os tokens do título e do autor do livro
+        for token in _WORD_RE.findall(f"{book._title_lc} {book._author_lc}"):
+            self._token_index.setdefault(token, set()).add(book.isbn)
+
     def register_user(self, user_id: str, name: str, email: str):
+        # Interna o ID: comparações viram comparação de ponteiro
+        user_id = sys.intern(user_id)
         if user_id in self.users:
             raise ValueError(f"Usuário com ID {user_id} já existe")
 
         # Verifica se email já está em uso
-        for user in self.users.values():
-            if user.email == email:
-                raise ValueError(f"Email {email} já está em uso")
+        if email in self._emails:
+            raise ValueError(f"Email {email} já está em uso")
 
         self.users[user_id] = User(user_id, name, email)
+        self._emails.add(email)
         return f"Usuário '{name}' registrado com sucesso"
 
     def borrow_book(self, user_id: str, isbn: str, loan_days: int = 14):
@@ -124,23 +268,27 @@ class LibraryManager:
         if book.available_copies <= 0:
             raise ValueError("Não há cópias disponíveis deste livro")
 
+        user_loans = self._active_loans_by_user.setdefault(user_id, {})
+
         # Verifica se usuário já tem este livro emprestado
-        for loan in self.loans:
-            if loan.user_id == user_id and loan.isbn == isbn and loan.is_active:
-                raise ValueError("Usuário já possui este livro emprestado")
+        if isbn in user_loans:
+            raise ValueError("Usuário já possui este livro emprestado")
 
         # Verifica limite de livros por usuário (máximo 5)
-        active_loans = [l for l in self.loans if l.user_id == user_id and l.is_active]
-        if len(active_loans) >= 5:
+        if len(user_loans) >= 5:
             raise ValueError(
                 "Usuário atingiu o limite máximo de empréstimos (5 livros)"
             )
 
         # Realiza o empréstimo
         loan = Loan(user_id, isbn, loan_days)
-        self.loans.append(loan)
+        self._active_loans[id(loan)] = loan
+        user_loans[isbn] = loan
+        heapq.heappush(self._active_loan_heap, (loan.due_ts, id(loan), loan))
         book.available_copies -= 1
-        user.borrowed_books.append(isbn)
+        user.borrowed_books.add(isbn)
+        self._available_copies_sum -= 1
+        self._active_loan_count += 1
 
         return f"Empréstimo realizado: '{book.title}' para {user.name}"
 
@@ -151,44 +299,112 @@ class LibraryManager:
         if isbn not in self.books:
             raise ValueError("Livro não encontrado")
 
-        # Encontra o empréstimo ativo
-        loan = None
-        for l in self.loans:
-            if l.user_id == user_id and l.isbn == isbn and l.is_active:
-                loan = l
-                break
+        # Encontra o empréstimo ativo pelo índice
+        loan = self._active_loans_by_user.get(user_id, {}).pop(isbn, None)
 
         if not loan:
             raise ValueError("Empréstimo ativo não encontrado")
 
         # Realiza a devolução
         loan.return_book()
+        del self._active_loans[id(loan)]
+        self._archived_loans.append(loan)
         self.books[isbn].available_copies += 1
-        self.users[user_id].borrowed_books.remove(isbn)
+        self.users[user_id].borrowed_books.discard(isbn)
+        self._available_copies_sum += 1
+        self._active_loan_count -= 1
 
         overdue_message = ""
-        if loan.days_overdue() > 0:
-            overdue_message = f" (Devolvido com {loan.days_overdue()} dias de atraso)"
+        days_overdue = loan.days_overdue()
+        if days_overdue > 0:
+            overdue_message = f" (Devolvido com {days_overdue} dias de atraso)"
 
         return f"Livro '{self.books[isbn].title}' devolvido por {self.users[user_id].name}{overdue_message}"
 
     def search_books(self, query: str):
         # Busca livros por título ou autor
-        results = []
         query_lower = query.lower()
 
+        cached = self._search_cache.get(query_lower)
+        if cached is not None:
+            return list(cached)
+
+        # Consulta de uma única palavra: resolve pelo índice invertido
+        # (um trecho só de letras/dígitos sempre cai dentro de um token)
+        if _WORD_RE.fullmatch(query_lower):
+            isbns = set()
+            for token, token_isbns in self._token_index.items():
+                if query_lower in token:
+                    isbns.update(token_isbns)
+            books = self.books
+            results = [books[isbn] for isbn in isbns]
+        else:
+            # Consultas com espaços/pontuação: varredura sobre os campos
+            # minúsculos pré-computados
+            results = [
+                book
+                for book in self.books.values()
+                if query_lower in book._title_lc or query_lower in book._author_lc
+            ]
+
+        if len(self._search_cache) >= 256:
+            self._search_cache.clear()
+        self._search_cache[query_lower] = results
+        return list(results)
+
+    def update_due_date(self, user_id: str, isbn: str, due_date: datetime):
+        # Altera o vencimento de um empréstimo ativo, reindexando-o no
+        # heap; atribuir loan.due_date diretamente não atualiza o heap
+        loan = self._active_loans_by_user.get(user_id, {}).get(isbn)
+
+        if loan is None:
+            raise ValueError("Empréstimo ativo não encontrado")
+
+        loan.due_date = due_date
+        heapq.heappush(self._active_loan_heap, (loan.due_ts, id(loan), loan))
+        return f"Vencimento atualizado para {due_date.isoformat()}"
+
+    def search_books_many(self, queries: List[str]):
+        # Busca vários termos em uma única passada pelo acervo,
+        # amortizando o custo da varredura entre as consultas
+        results: Dict[str, List[Book]] = {query: [] for query in queries}
+        lowered = [(query, query.lower()) for query in results]
+
         for book in self.books.values():
-            if query_lower in book.title.lower() or query_lower in book.author.lower():
-                results.append(book)
+            title_lc = book._title_lc
+            author_lc = book._author_lc
+            for query, query_lower in lowered:
+                if query_lower in title_lc or query_lower in author_lc:
+                    results[query].append(book)
 
         return results
 
     def get_overdue_loans(self):
         # Retorna lista de empréstimos em atraso
+        # Consome o topo do heap até a primeira data de vencimento futura;
+        # empréstimos já devolvidos são descartados, os demais retornam ao heap
+        now_ts = time.time()
+        heap = self._active_loan_heap
         overdue = []
-        for loan in self.loans:
-            if loan.is_overdue():
+        stale = []
+        seen = set()
+        while heap and heap[0][0] < now_ts:
+            due_ts, marker, loan = heapq.heappop(heap)
+            # Descarta devolvidos e entradas duplicadas do mesmo empréstimo
+            if not loan.is_active or marker in seen:
+                continue
+            seen.add(marker)
+            if due_ts != loan.due_ts:
+                # Chave antiga (vencimento alterado): reindexa com a atual
+                stale.append(loan)
+            elif loan.is_overdue(now_ts):
                 overdue.append(loan)
+            else:
+                stale.append(loan)
+        for loan in overdue:
+            heapq.heappush(heap, (loan.due_ts, id(loan), loan))
+        for loan in stale:
+            heapq.heappush(heap, (loan.due_ts, id(loan), loan))
         return overdue
 
     def get_user_loans(self, user_id: str):
@@ -196,26 +412,16 @@ class LibraryManager:
         if user_id not in self.users:
             raise ValueError("Usuário não encontrado")
 
-        active_loans = []
-        for loan in self.loans:
-            if loan.user_id == user_id and loan.is_active:
-                active_loans.append(loan)
-
-        return active_loans
+        return list(self._active_loans_by_user.get(user_id, {}).values())
 
     def get_library_stats(self):
-        total_books = sum(book.total_copies for book in self.books.values())
-        available_books = sum(book.available_copies for book in self.books.values())
-        active_loans = len([l for l in self.loans if l.is_active])
-        overdue_loans = len(self.get_overdue_loans())
-
         return {
             "total_titles": len(self.books),
-            "total_books": total_books,
-            "available_books": available_books,
+            "total_books": self._total_copies_sum,
+            "available_books": self._available_copies_sum,
             "registered_users": len(self.users),
-            "active_loans": active_loans,
-            "overdue_loans": overdue_loans,
+            "active_loans": self._active_loan_count,
+            "overdue_loans": len(self.get_overdue_loans()),
         }
 
 
@@ -225,11 +431,19 @@ def main():
     print("=== Sistema de Gerenciamento de Biblioteca ===\n")
 
     print("Adicionando livros ao acervo...")
-    library.add_book(
-        "978-0-7475-3269-9", "Harry Potter e a Pedra Filosofal", "J.K. Rowling", 1997, 3
+    library.bulk_add_books(
+        [
+            (
+                "978-0-7475-3269-9",
+                "Harry Potter e a Pedra Filosofal",
+                "J.K. Rowling",
+                1997,
+                3,
+            ),
+            ("978-85-250-4277-1", "Dom Casmurro", "Machado de Assis", 1899, 2),
+            ("978-0-06-112008-4", "1984", "George Orwell", 1949, 2),
+        ]
     )
-    library.add_book("978-85-250-4277-1", "Dom Casmurro", "Machado de Assis", 1899, 2)
-    library.add_book("978-0-06-112008-4", "1984", "George Orwell", 1949, 2)
 
     print("\nRegistrando usuários...")
     library.register_user("001", "João Silva", "joao@email.com")
@@ -198,6 +198,60 @@ class TestLibraryManager(unittest.TestCase):
         results = self.library.search_books("Inexistente")
         self.assertEqual(len(results), 0)
 
+    def test_update_due_date_overdue(self):
+        """Teste 20: Alterar vencimento reflete nos empréstimos em atraso"""
+        self.library.add_book(**self.sample_book)
+        self.library.register_user(**self.sample_user)
+        self.library.borrow_book(self.sample_user["user_id"], self.sample_book["isbn"])
+
+        # Antecipa o vencimento para o passado
+        self.library.update_due_date(
+            self.sample_user["user_id"],
+            self.sample_book["isbn"],
+            datetime.now() - timedelta(days=3),
+        )
+        self.assertEqual(len(self.library.get_overdue_loans()), 1)
+        self.assertEqual(self.library.get_library_stats()["overdue_loans"], 1)
+
+        # Estende o vencimento de volta para o futuro
+        self.library.update_due_date(
+            self.sample_user["user_id"],
+            self.sample_book["isbn"],
+            datetime.now() + timedelta(days=7),
+        )
+        self.assertEqual(len(self.library.get_overdue_loans()), 0)
+        self.assertEqual(self.library.get_library_stats()["overdue_loans"], 0)
+
+    def test_search_books_many(self):
+        """Teste 18: Busca em lote de vários termos"""
+        self.library.add_book(
+            "978-1", "Harry Potter e a Pedra Filosofal", "J.K. Rowling", 1997
+        )
+        self.library.add_book("978-2", "1984", "George Orwell", 1949)
+
+        results = self.library.search_books_many(["Harry", "Orwell", "Inexistente"])
+
+        self.assertEqual(len(results["Harry"]), 1)
+        self.assertEqual(len(results["Orwell"]), 1)
+        self.assertEqual(len(results["Inexistente"]), 0)
+
+    def test_bulk_add_books(self):
+        """Teste 19: Carga em lote de livros novos"""
+        result = self.library.bulk_add_books(
+            [
+                ("978-1", "Harry Potter e a Pedra Filosofal", "J.K. Rowling", 1997, 2),
+                ("978-2", "1984", "George Orwell", 1949),
+            ]
+        )
+
+        self.assertIn("2 livros adicionados", result)
+        self.assertEqual(len(self.library.books), 2)
+        self.assertEqual(len(self.library.search_books("Harry")), 1)
+
+        stats = self.library.get_library_stats()
+        self.assertEqual(stats["total_books"], 3)  # 2 + 1
+        self.assertEqual(stats["available_books"], 3)
+
     def test_get_library_stats(self):
         """Teste 12: Estatísticas da biblioteca"""
         # Adicionar dados de teste